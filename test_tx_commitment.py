@@ -0,0 +1,109 @@
+import asyncio
+
+from web3 import Web3
+
+import txrpc
+from txcommit import commitment_preimage, hex_commitments, keccak256_many
+
+TX = "0x4283fefc63f0cd0e873a0000c6d07ef7b77e90d3593ad699fc1f7cd5bb2e35cb"
+COMMITMENT = "0xc4afe24e3cdf06d711671d6faa3fd8cd85bf0aaddf37938a90ba1f493e8de1d8"
+
+
+def test_commitment_matches_reference_formula():
+    chain_id, block, status, gas = 1, 100, 1, 21943
+    reference = Web3.keccak(
+        chain_id.to_bytes(8, "big")
+        + bytes.fromhex(TX[2:])
+        + block.to_bytes(8, "big")
+        + status.to_bytes(1, "big")
+        + gas.to_bytes(8, "big")
+    )
+    preimage = commitment_preimage(
+        chain_id.to_bytes(8, "big"), bytes.fromhex(TX[2:]), block, status, gas
+    )
+    assert keccak256_many([preimage]) == [bytes(reference)]
+    assert hex_commitments([preimage, preimage]) == {preimage: COMMITMENT}
+
+
+def _receipt(h, block="0x64"):
+    return {"transactionHash": h, "blockNumber": block, "status": "0x1", "gasUsed": "0x55b7"}
+
+
+def _fetch(monkeypatch, reply, hashes, **kwargs):
+    """Run batch_fetch against a stubbed transport; `reply` maps a batch to its response."""
+    calls = []
+
+    async def fake_make_request(session, url, payload):
+        calls.append(payload)
+        return reply(payload)
+
+    monkeypatch.setattr(txrpc, "async_make_request", fake_make_request)
+
+    async def run():
+        return await txrpc.batch_fetch(None, "http://rpc", hashes, 2, asyncio.Semaphore(2), **kwargs)
+
+    return asyncio.run(run()), calls
+
+
+def test_batch_fetch_matches_replies_by_id(monkeypatch):
+    hashes = ["0x" + c * 64 for c in "abc"]
+
+    def reply(payload):
+        # Providers may answer a batch in any order
+        return [
+            {"jsonrpc": "2.0", "id": call["id"], "result": _receipt(call["params"][0])}
+            for call in reversed(payload)
+        ]
+
+    out, calls = _fetch(monkeypatch, reply, hashes)
+    assert [len(payload) for payload in calls] == [2, 1]
+    for h in hashes:
+        assert out[h]["error"] is None
+        assert out[h]["receipt"]["transactionHash"] == h
+
+
+def test_batch_fetch_flags_missing_replies(monkeypatch):
+    hashes = ["0x" + c * 64 for c in "ab"]
+
+    def reply(payload):
+        return [
+            {"jsonrpc": "2.0", "id": call["id"], "result": _receipt(call["params"][0])}
+            for call in payload
+            if call["params"][0] != hashes[1]
+        ]
+
+    out, _ = _fetch(monkeypatch, reply, hashes)
+    assert out[hashes[0]]["error"] is None
+    assert out[hashes[1]]["receipt"] is None
+    assert out[hashes[1]]["error"] == "no response to this call in the batch reply"
+
+
+def test_batch_fetch_block_hints_fall_back_per_tx(monkeypatch):
+    hashes = ["0x" + c * 64 for c in "abc"]
+    in_block = {"0x64": [hashes[0]], "0x65": []}  # hashes[1] hinted to the wrong block
+
+    def reply(payload):
+        if payload[0]["method"] == "eth_getBlockReceipts":
+            return [
+                {
+                    "jsonrpc": "2.0",
+                    "id": call["id"],
+                    "result": [_receipt(h) for h in in_block[call["params"][0]]],
+                }
+                for call in payload
+            ]
+        return [
+            {"jsonrpc": "2.0", "id": call["id"], "result": _receipt(call["params"][0])}
+            for call in payload
+        ]
+
+    hints = {hashes[0]: "0x64", hashes[1]: "0x65"}
+    out, calls = _fetch(monkeypatch, reply, hashes, block_hints=hints)
+    assert [call["method"] for payload in calls for call in payload] == [
+        "eth_getBlockReceipts",
+        "eth_getBlockReceipts",
+        "eth_getTransactionReceipt",
+        "eth_getTransactionReceipt",
+    ]
+    assert [call["params"][0] for call in calls[-1]] == hashes[1:]
+    assert all(out[h]["receipt"]["transactionHash"] == h for h in hashes)
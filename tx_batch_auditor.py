@@ -1,31 +1,53 @@
-    """
-    Compute a commitment over basic receipt fields.
+"""
+Compute a commitment over basic receipt fields.
 
-    Preimage layout (big-endian integers):
-        chainId[8]      uint64
-        txHash[32]      raw 32-byte tx hash
-        blockNumber[8]  uint64
-        status[1]       uint8 (0 or 1)
-        gasUsed[8]      uint64
+Preimage layout (big-endian integers):
+    chainId[8]      uint64
+    txHash[32]      raw 32-byte tx hash
+    blockNumber[8]  uint64
+    status[1]       uint8 (0 or 1)
+    gasUsed[8]      uint64
 
-    Commitment:
-        keccak256(preimage)
+Commitment:
+    keccak256(preimage)
 
-    Returns:
-        dict with chainId, blockNumber, status, gasUsed, and commitment (0x-hex).
-    """
+Returns:
+    dict with chainId, blockNumber, status, gasUsed, and commitment (0x-hex).
+"""
 
 import os
 import sys
 import time
 import json
+import asyncio
 import argparse
+from pathlib import Path
 from typing import List, Dict, Any, Optional
+
 from web3 import Web3
+
+from txrpc import (
+    HTTP2_AVAILABLE,
+    HTTP2Provider,
+    close_provider,
+    hex_int,
+    make_session,
+    positive_int,
+    run_all,
+    split_block_hint,
+)
+from txcommit import commitment_preimage, hex_commitments
+
+try:  # optional: much faster JSON encoding for large result sets
+    import orjson
+except ImportError:
+    orjson = None
+
 __version__ = "0.1.0"
 
 DEFAULT_RPC_1 = os.getenv("RPC_URL", "https://mainnet.infura.io/v3/your_api_key")
 DEFAULT_RPC_2 = os.getenv("RPC_URL_2")
+OUTPUT_FLUSH_ROWS = 64
 
 NETWORKS = {
     1: "Ethereum Mainnet",
@@ -43,8 +65,26 @@ def network_name(cid: int) -> str:
     return NETWORKS.get(cid, f"Unknown (chain ID {cid})")
 
 
-def connect(rpc: str, label: str) -> Web3:
-    w3 = Web3(Web3.HTTPProvider(rpc, request_kwargs={"timeout": 20}))
+def write_json(obj: Any) -> None:
+    """Pretty-print obj as sorted, 2-space-indented UTF-8 JSON on stdout."""
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    else:
+        # ensure_ascii=False: raw UTF-8 like orjson, not \uXXXX escapes
+        data = json.dumps(obj, indent=2, sort_keys=True, ensure_ascii=False).encode()
+    sys.stdout.flush()
+    sys.stdout.buffer.write(data + b"\n")
+    sys.stdout.buffer.flush()
+
+
+def connect(rpc: str, label: str, pool_size: int = 64, http2: bool = False) -> Web3:
+    if http2:
+        provider = HTTP2Provider(rpc, pool_size, timeout=20)
+    else:
+        provider = Web3.HTTPProvider(
+            rpc, request_kwargs={"timeout": 20}, session=make_session(pool_size)
+        )
+    w3 = Web3(provider)
     if not w3.is_connected():
         print(f"❌ Failed to connect to {label} RPC: {rpc}", file=sys.stderr)
         sys.exit(1)
@@ -69,7 +109,7 @@ def parse_args() -> argparse.Namespace:
         default=DEFAULT_RPC_1,
         help="Primary RPC URL (default from RPC_URL env)",
     )
-        p.add_argument(
+    p.add_argument(
         "--no-color",
         action="store_true",
         help="Disable emojis / decorative characters in stdout",
@@ -82,7 +122,8 @@ def parse_args() -> argparse.Namespace:
     )
     p.add_argument(
         "--file",
-        help="File with one transaction hash (0x...) per line",
+        help="File with one transaction hash (0x...) per line, optionally "
+        "followed by its block number",
     )
     p.add_argument(
         "txs",
@@ -100,7 +141,39 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Print JSON instead of human-readable table",
     )
-        p.add_argument(
+    p.add_argument(
+        "--batch-size",
+        type=positive_int,
+        default=100,
+        help="Max tx hashes per JSON-RPC batch request",
+    )
+    p.add_argument(
+        "--concurrency",
+        type=positive_int,
+        default=8,
+        help="Max JSON-RPC batch requests in flight at once across providers",
+    )
+    p.add_argument(
+        "--pool-size",
+        type=positive_int,
+        default=64,
+        help="Max keep-alive HTTP connections per provider",
+    )
+    p.add_argument(
+        "--block-receipts",
+        action="store_true",
+        help="For hashes given with their block (\"<hash>,<block>\" lines), fetch "
+        "receipts with one eth_getBlockReceipts per distinct block; the rest use "
+        "eth_getTransactionReceipt. Cuts calls when many hashes share blocks; "
+        "not all providers support it",
+    )
+    p.add_argument(
+        "--http2",
+        action="store_true",
+        help="Send RPC traffic over HTTP/2 via httpx, multiplexing concurrent "
+        "requests on one connection (needs: pip install 'httpx[http2]')",
+    )
+    p.add_argument(
         "--version",
         action="version",
         version=f"%(prog)s {__version__}",
@@ -111,73 +184,101 @@ def parse_args() -> argparse.Namespace:
 
 
 def read_hashes_from_file(path: str) -> List[str]:
-    out: List[str] = []
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                s = line.strip()
-                if not s:
-                    continue
-                out.append(s)
+        # One buffered read and a C-level split instead of per-line reads
+        data = Path(path).read_text(encoding="utf-8")
     except FileNotFoundError:
         print(f"❌ File not found: {path}", file=sys.stderr)
         sys.exit(1)
     except OSError as e:
         print(f"❌ Failed to read file {path}: {e}", file=sys.stderr)
         sys.exit(1)
-    return out
+    return [s for s in map(str.strip, data.splitlines()) if s]
 
 
-def validate_tx_hash(h: str) -> bool:
-    if not h.startswith("0x") or len(h) != 66:
-        return False
+def decode_tx_hash(h: str) -> Optional[bytes]:
+    """Return the 32 raw bytes of a 0x-prefixed tx hash, or None if invalid."""
+    # bytes.fromhex checks hex digits in C without building a 256-bit int
+    if len(h) != 66 or h[:2] != "0x":
+        return None
     try:
-        int(h[2:], 16)
+        raw = bytes.fromhex(h[2:])
     except ValueError:
-        return False
-    return True
+        return None
+    return raw if len(raw) == 32 else None
 
 
-def build_commitment(
-    w3: Web3,
-    tx_hash: str,
-) -> Dict[str, Any]:
+def validate_tx_hash(h: str) -> bool:
+    return decode_tx_hash(h) is not None
+
+
+def _receipt_or_raise(fetched: Dict[str, Any], tx_hash: str) -> Dict[str, Any]:
+    if fetched["error"] is not None:
+        raise RuntimeError(fetched["error"])
+    if fetched["receipt"] is None:
+        raise RuntimeError(f"Transaction with hash: '{tx_hash}' not found.")
+    return fetched["receipt"]
+
+
+def build_commitments(
+    chain_id: int,
+    chain_bytes: bytes,
+    fetched: Dict[str, Dict[str, Any]],
+    tx_bytes: Dict[str, bytes],
+) -> Dict[str, Dict[str, Any]]:
     """
-    Compute commitment:
+    Decode every fetched receipt and assemble its commitment preimage:
       keccak(chainId[8] || txHash[32] || blockNumber[8] || status[1] || gasUsed[8])
-    Returns a dict with chainId, blockNumber, status, gasUsed, and hex commitment.
+    The hex commitment is filled in by fill_commitments(); `chain_bytes` is
+    `chain_id` pre-encoded as 8 big-endian bytes.
+    Returns {tx_hash: {"commitment": dict with chainId, blockNumber, status,
+    gasUsed, and commitment (or None), "error": str or None}}.
     """
-    rcpt = w3.eth.get_transaction_receipt(tx_hash)
-    chain_id = int(w3.eth.chain_id)
-    block_number = int(rcpt.blockNumber)
-    status = int(rcpt.status)
-    gas_used = int(rcpt.gasUsed)
-
-    # Encode components
-    chain_bytes = chain_id.to_bytes(8, "big", signed=False)
-    tx_bytes = bytes.fromhex(tx_hash[2:])
-    block_bytes = block_number.to_bytes(8, "big", signed=False)
-    status_bytes = status.to_bytes(1, "big", signed=False)
-    gas_bytes = gas_used.to_bytes(8, "big", signed=False)
-
-    preimage = chain_bytes + tx_bytes + block_bytes + status_bytes + gas_bytes
-    commit = w3.keccak(preimage)
-
-    return {
-        "chainId": chain_id,
-        "blockNumber": block_number,
-        "status": status,
-        "gasUsed": gas_used,
-        "commitment": commit.hex(),
-    }
+    out: Dict[str, Dict[str, Any]] = {}
+    for tx_hash, entry in fetched.items():
+        try:
+            rcpt = _receipt_or_raise(entry, tx_hash)
+            block_number = hex_int(rcpt["blockNumber"])
+            status = hex_int(rcpt["status"])
+            gas_used = hex_int(rcpt["gasUsed"])
+        except Exception as e:
+            out[tx_hash] = {"commitment": None, "error": str(e) or type(e).__name__}
+            continue
+        fields = {
+            "chainId": chain_id,
+            "blockNumber": block_number,
+            "status": status,
+            "gasUsed": gas_used,
+            "commitment": None,
+        }
+        out[tx_hash] = {
+            "commitment": fields,
+            "error": None,
+            "preimage": commitment_preimage(
+                chain_bytes, tx_bytes[tx_hash], block_number, status, gas_used
+            ),
+        }
+    return out
+
+
+def fill_commitments(*built_sets: Dict[str, Dict[str, Any]]) -> None:
+    """Replace the pending preimages of all providers by their commitments."""
+    commitments = hex_commitments(
+        e["preimage"] for built in built_sets for e in built.values() if "preimage" in e
+    )
+    for built in built_sets:
+        for e in built.values():
+            if "preimage" in e:
+                e["commitment"]["commitment"] = commitments[e.pop("preimage")]
 
 
 def audit_tx(
     tx_hash: str,
-    w3_primary: Web3,
-    w3_secondary: Optional[Web3],
+    primary_chain_id: int,
+    secondary_chain_id: Optional[int],
+    built_primary: Dict[str, Any],
+    built_secondary: Optional[Dict[str, Any]],
 ) -> Dict[str, Any]:
-    start = time.time()
     result: Dict[str, Any] = {
         "txHash": tx_hash,
         "primary": None,
@@ -185,25 +286,18 @@ def audit_tx(
         "match": None,
         "errorPrimary": None,
         "errorSecondary": None,
-        "timingSec": None,
-        "primaryChainId": int(w3_primary.eth.chain_id),
-        "secondaryChainId": int(w3_secondary.eth.chain_id) if w3_secondary is not None else None,
+        "primaryChainId": primary_chain_id,
+        "secondaryChainId": secondary_chain_id,
     }
 
     # Primary
-    try:
-        primary = build_commitment(w3_primary, tx_hash)
-        result["primary"] = primary
-    except Exception as e:
-        result["errorPrimary"] = str(e)
+    result["primary"] = built_primary["commitment"]
+    result["errorPrimary"] = built_primary["error"]
 
     # Secondary (optional)
-    if w3_secondary is not None:
-        try:
-            secondary = build_commitment(w3_secondary, tx_hash)
-            result["secondary"] = secondary
-        except Exception as e:
-            result["errorSecondary"] = str(e)
+    if secondary_chain_id is not None and built_secondary is not None:
+        result["secondary"] = built_secondary["commitment"]
+        result["errorSecondary"] = built_secondary["error"]
 
     # Compare if both succeeded
     if result["primary"] and result["secondary"]:
@@ -211,7 +305,6 @@ def audit_tx(
             result["primary"]["commitment"] == result["secondary"]["commitment"]
         )
 
-    result["timingSec"] = round(time.time() - start, 3)
     return result
 
 
@@ -224,17 +317,38 @@ def main() -> None:
     else:
         hashes = list(args.txs)
 
-    # Simple validation & dedup
-    hashes = [h.strip() for h in hashes if h.strip()]
-    hashes = list(dict.fromkeys(hashes))  # preserve order, remove dups
- emoji_link = "🔗" if not args.no_color else "[TX]"
+    # Strip, dedup and validate in one pass; keep the decoded bytes for the
+    # commitment preimages so each hash is hex-decoded once
+    seen = set()
+    clean: List[str] = []
+    bad: List[str] = []
+    tx_bytes: Dict[str, bytes] = {}
+    block_hints: Dict[str, str] = {}  # from "<hash>,<block>" lines
+    for raw in hashes:
+        line = raw.strip()
+        if not line or line in seen:
+            continue
+        seen.add(line)
+        split = split_block_hint(line)
+        b = decode_tx_hash(split[0]) if split is not None else None
+        if b is None:
+            bad.append(line)
+            continue
+        h = split[0]
+        if h in tx_bytes:
+            continue
+        tx_bytes[h] = b
+        clean.append(h)
+        if split[1] is not None:
+            block_hints[h] = split[1]
+    hashes = clean
+    emoji_link = "🔗" if not args.no_color else "[TX]"
     emoji_ok = "✅" if not args.no_color else "[OK]"
     emoji_fail = "❌" if not args.no_color else "[FAIL]"
-    if not hashes:
+    if not hashes and not bad:
         print("⚠️  No transaction hashes provided. Use --file or positional tx hashes.", file=sys.stderr)
         sys.exit(1)
 
-    bad = [h for h in hashes if not validate_tx_hash(h)]
     if bad:
         print("❌ Invalid transaction hash(es):", file=sys.stderr)
         for h in bad:
@@ -244,7 +358,21 @@ def main() -> None:
     if args.max > 0 and len(hashes) > args.max:
         hashes = hashes[: args.max]
 
-     # Connections
+    if args.http2 and not HTTP2_AVAILABLE:
+        print(
+            "❌ --http2 needs httpx with HTTP/2 support: pip install 'httpx[http2]'",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if args.block_receipts and not block_hints:
+        print(
+            "⚠️  --block-receipts needs block numbers in the input (<hash>,<block>); "
+            "fetching every receipt per tx.",
+            file=sys.stderr,
+        )
+
+    # Connections
     if "your_api_key" in args.rpc1:
         print(
             "⚠️  Primary RPC still uses placeholder 'your_api_key'. "
@@ -253,15 +381,29 @@ def main() -> None:
         )
 
 
-    w3_primary = connect(args.rpc1, "primary")
+    w3_primary = connect(args.rpc1, "primary", args.pool_size, args.http2)
+    # chainId is invariant per provider: fetch it once, not once per tx
+    primary_chain_id = int(w3_primary.eth.chain_id)
+    # The Web3 provider is only needed for chainId; receipts go through run_all
+    close_provider(w3_primary)
+    # Also invariant: the encoded chain ID and the network name
+    primary_chain_bytes = primary_chain_id.to_bytes(8, "big")
+    primary_net_str = network_name(primary_chain_id)
     w3_secondary: Optional[Web3] = None
+    secondary_chain_id: Optional[int] = None
+    secondary_chain_bytes = b""
+    secondary_net_str = ""
     if args.rpc2:
-        w3_secondary = connect(args.rpc2, "secondary")
-            if w3_secondary is not None:
-        if int(w3_primary.eth.chain_id) != int(w3_secondary.eth.chain_id):
+        w3_secondary = connect(args.rpc2, "secondary", args.pool_size, args.http2)
+        secondary_chain_id = int(w3_secondary.eth.chain_id)
+        close_provider(w3_secondary)
+        secondary_chain_bytes = secondary_chain_id.to_bytes(8, "big")
+        secondary_net_str = network_name(secondary_chain_id)
+    if w3_secondary is not None:
+        if primary_chain_id != secondary_chain_id:
             print(
-                f"❌ chainId mismatch between primary ({w3_primary.eth.chain_id}) "
-                f"and secondary ({w3_secondary.eth.chain_id}) RPCs.",
+                f"❌ chainId mismatch between primary ({primary_chain_id}) "
+                f"and secondary ({secondary_chain_id}) RPCs.",
                 file=sys.stderr,
             )
             sys.exit(1)
@@ -270,21 +412,67 @@ def main() -> None:
     t0 = time.time()
     results: List[Dict[str, Any]] = []
 
+    # One batched round-trip per chunk per provider, both providers in flight
+    # concurrently; the commitment compare then happens in-process
+    fetched_primary, fetched_secondary = asyncio.run(
+        run_all(
+            hashes,
+            args.rpc1,
+            args.rpc2 if w3_secondary is not None else None,
+            args.batch_size,
+            args.concurrency,
+            args.pool_size,
+            block_hints=block_hints if args.block_receipts else None,
+            http2=args.http2,
+            timeout=20,
+        )
+    )
+
+    # Assemble every preimage from both providers first, then hash each
+    # distinct preimage once in a single batch
+    built_primary = build_commitments(
+        primary_chain_id, primary_chain_bytes, fetched_primary, tx_bytes
+    )
+    built_secondary = (
+        build_commitments(secondary_chain_id, secondary_chain_bytes, fetched_secondary, tx_bytes)
+        if fetched_secondary is not None
+        else None
+    )
+    fill_commitments(built_primary, *([built_secondary] if built_secondary is not None else []))
+
     for h in hashes:
-        res = audit_tx(h, w3_primary, w3_secondary)
+        res = audit_tx(
+            h,
+            primary_chain_id,
+            secondary_chain_id,
+            built_primary[h],
+            built_secondary[h] if built_secondary is not None else None,
+        )
         results.append(res)
 
     elapsed = round(time.time() - t0, 3)
 
     if args.json:
-                ok = sum(1 for r in results if r.get("match") is True)
+        ok = sum(1 for r in results if r.get("match") is True)
         mismatch = sum(1 for r in results if r.get("match") is False)
-        primary_err = sum(1 for r in results if r.get("errorPrimary"))
-        secondary_err = sum(1 for r in results if r.get("errorSecondary"))
+        primary_err = sum(1 for r in results if r["errorPrimary"] is not None)
+        secondary_err = sum(1 for r in results if r["errorSecondary"] is not None)
 
         payload = {
-            "primary": {...},
-            "secondary": ...,
+            "primary": {
+                "rpc": args.rpc1,
+                "chainId": primary_chain_id,
+                "network": primary_net_str,
+            },
+            "secondary": (
+                {
+                    "rpc": args.rpc2,
+                    "chainId": secondary_chain_id,
+                    "network": secondary_net_str,
+                }
+                if secondary_chain_id is not None
+                else None
+            ),
             "elapsedSec": elapsed,
             "summary": {
                 "total": len(results),
@@ -294,9 +482,8 @@ def main() -> None:
                 "secondaryErrors": secondary_err,
             },
             "results": results,
-        
         }
-                print(
+        print(
             f"🌐 primary={payload['primary']['network']} "
             f"(chainId {payload['primary']['chainId']})",
             file=sys.stderr,
@@ -308,43 +495,55 @@ def main() -> None:
                 file=sys.stderr,
             )
 
-        print(json.dumps(payload, indent=2, sort_keys=True))
+        write_json(payload)
         return
 
     # Human-readable summary
     print(
-        f"🌐 Primary: {network_name(int(w3_primary.eth.chain_id))} "
-        f"(chainId {w3_primary.eth.chain_id})"
+        f"🌐 Primary: {primary_net_str} "
+        f"(chainId {primary_chain_id})"
     )
     if w3_secondary is not None:
         print(
-            f"🌐 Secondary: {network_name(int(w3_secondary.eth.chain_id))} "
-            f"(chainId {w3_secondary.eth.chain_id})"
+            f"🌐 Secondary: {secondary_net_str} "
+            f"(chainId {secondary_chain_id})"
         )
     print(f"🧮 Auditing {len(results)} transaction(s) in {elapsed}s\n")
 
+    # Lines are buffered and written in blocks of OUTPUT_FLUSH_ROWS instead
+    # of ~6 print() calls (lock + write syscall each) per tx
+    out: List[str] = []
+
+    def emit(line: str) -> None:
+        out.append(line)
+        if len(out) >= OUTPUT_FLUSH_ROWS:
+            sys.stdout.write("\n".join(out) + "\n")
+            out.clear()
+
     for res in results:
-        print(f"{emoji_link} {res['txHash']}")
-        if res["errorPrimary"]:
-            print(f"   ❌ Primary error: {res['errorPrimary']}")
+        emit(f"{emoji_link} {res['txHash']}")
+        if res["errorPrimary"] is not None:
+            emit(f"   ❌ Primary error: {res['errorPrimary']}")
             continue
 
         p = res["primary"]
-        print(
+        emit(
             f"   🧱 block={p['blockNumber']}  status={p['status']}  "
             f"gasUsed={p['gasUsed']}  chainId={p['chainId']}"
         )
-        print(f"   🔐 commitment (primary): {p['commitment']}")
+        emit(f"   🔐 commitment (primary): {p['commitment']}")
 
         if w3_secondary is not None:
-            if res["errorSecondary"]:
-                print(f"   ⚠️ Secondary error: {res['errorSecondary']}")
+            if res["errorSecondary"] is not None:
+                emit(f"   ⚠️ Secondary error: {res['errorSecondary']}")
             elif res["secondary"]:
                 s = res["secondary"]
                 tag = "✅ MATCH" if res["match"] else "❌ MISMATCH"
-                print(f"   🔐 commitment (secondary): {s['commitment']}  [{tag}]")
+                emit(f"   🔐 commitment (secondary): {s['commitment']}  [{tag}]")
 
-        print(f"   ⏱️  per-tx time: {res['timingSec']}s\n")
+        emit("")
+    if out:
+        sys.stdout.write("\n".join(out) + "\n")
 
 
 if __name__ == "__main__":
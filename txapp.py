@@ -2,17 +2,21 @@
 import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from web3 import Web3
 from typing import Dict, Any 
+from txcommit import commitment_preimage, keccak256_many
+from txrpc import backoff_delay, make_session
 # new lines
-def safe_rpc_call(func, *args, retries=3, delay=1):
+def safe_rpc_call(func, *args, retries=5):
     """Retry wrapper for transient RPC errors."""
     for attempt in range(1, retries + 1):
         try:
             return func(*args)
         except Exception as e:
             print(f"⚠️  RPC call failed (attempt {attempt}/{retries}): {e}")
-            time.sleep(delay)
+            if attempt < retries:
+                time.sleep(backoff_delay(attempt, e))
     print("❌ All RPC retries failed.")
     sys.exit(2)
     
@@ -34,7 +38,7 @@ def network_name(chain_id: int) -> str:
     return NETWORKS.get(chain_id, f"Unknown (chain ID {chain_id})")
 
 def w3_connect(url: str) -> Web3:
-    w3 = Web3(Web3.HTTPProvider(url, request_kwargs={"timeout": 30}))
+    w3 = Web3(Web3.HTTPProvider(url, request_kwargs={"timeout": 30}, session=make_session()))
     if not w3.is_connected():
         print(f"❌ RPC connection failed: {url}")
         sys.exit(1)
@@ -44,27 +48,25 @@ def parse_tx_hash(h: str) -> str:
     h = h.strip()
     if not h.startswith("0x"):
         h = "0x" + h
-    if len(h) != 66 or not Web3.is_hex(h):
+    try:
+        valid = len(h) == 66 and len(bytes.fromhex(h[2:])) == 32
+    except ValueError:
+        valid = False
+    if not valid:
         print("❌ Invalid transaction hash. Expected 0x + 64 hex characters.")
         sys.exit(1)
     return h
 
 
-def build_commitment(chain_id: int, tx_hash_hex: str, block_number: int, status: int, gas_used: int) -> str:
+def build_commitment(chain_bytes: bytes, tx_hash_hex: str, block_number: int, status: int, gas_used: int) -> str:
     # keccak(chainId[8] || txHash[32] || blockNumber[8] || status[1] || gasUsed[8])
-    payload = (
-        chain_id.to_bytes(8, "big")
-        + bytes.fromhex(tx_hash_hex[2:])
-        + block_number.to_bytes(8, "big")
-        + status.to_bytes(1, "big")
-        + gas_used.to_bytes(8, "big")
-    )
-    return "0x" + Web3.keccak(payload).hex()
+    # chain_bytes: chain ID pre-encoded as 8 big-endian bytes
+    payload = commitment_preimage(chain_bytes, bytes.fromhex(tx_hash_hex[2:]), block_number, status, gas_used)
+    return "0x" + keccak256_many([payload])[0].hex()
 
 def fetch_receipt_bundle(w3: Web3, txh: str) -> Dict[str, Any]:
     try:
         rcpt = safe_rpc_call(w3.eth.get_transaction_receipt, txh)
-tx = safe_rpc_call(w3.eth.get_transaction, txh)
     except Exception as e:
         print(f"❌ Failed to fetch receipt: {e}")
         sys.exit(2)
@@ -75,25 +77,27 @@ tx = safe_rpc_call(w3.eth.get_transaction, txh)
     gas_used = int(rcpt.gasUsed)
     effective_gas_price = getattr(rcpt, "effectiveGasPrice", None)
     if effective_gas_price is None:
-        # Legacy tx or provider doesn’t expose effectiveGasPrice
+        # Legacy tx or provider doesn’t expose effectiveGasPrice: only then
+        # is the transaction itself needed
+        tx = safe_rpc_call(w3.eth.get_transaction, txh)
         effective_gas_price = tx.get("gasPrice")
     total_fee_wei = gas_used * int(effective_gas_price) if effective_gas_price is not None else None
 
     block_number = int(rcpt.blockNumber)
+    chain_id = int(w3.eth.chain_id)  # one eth_chainId call, reused below
+    commitment = build_commitment(chain_id.to_bytes(8, "big"), txh, block_number, status, gas_used)
     # ✅ New lines to show block timestamp
-block = w3.eth.get_block(rcpt.blockNumber)
-print(f"🕒 Block timestamp: {time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(block.timestamp))} UTC")
+    block = w3.eth.get_block(rcpt.blockNumber)
     return {
-                "gas_used": gas_used,
+        "block_timestamp": block.timestamp,
         "total_fee_eth": Web3.from_wei(total_fee_wei, "ether") if total_fee_wei is not None else None,
-        "commitment": build_commitment(chain_id, txh, block_number, status, gas_used),
-        "chain_id": w3.eth.chain_id,
-        "network": network_name(w3.eth.chain_id),
+        "chain_id": chain_id,
+        "network": network_name(chain_id),
         "tx_hash": txh,
         "block_number": block_number,
         "status": status,
         "gas_used": gas_used,
-        "commitment": build_commitment(w3.eth.chain_id, txh, block_number, status, gas_used),
+        "commitment": commitment,
     }
 
 def print_bundle(label: str, bundle: dict):
@@ -103,12 +107,13 @@ def print_bundle(label: str, bundle: dict):
     print(f"👤 From: {bundle.get('from')}")
     print(f"📥 To:   {bundle.get('to')}")
     print(f"🔢 Block: {bundle['block_number']}")
+    print(f"🕒 Block timestamp: {time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(bundle['block_timestamp']))} UTC")
     print(f"📦 Status: {bundle['status']}  GasUsed: {bundle['gas_used']}")
     print(f"🧩 Soundness Commitment: {bundle['commitment']}")
 
 
 def main():
-       if len(sys.argv) != 2:
+    if len(sys.argv) != 2:
         print("Usage: python app.py <tx_hash>")
         print("Example:")
         print("  RPC_URL=https://mainnet.infura.io/v3/YOUR_KEY python app.py 0xdeadbeef...")
@@ -119,18 +124,27 @@ def main():
 
     start = time.time()
     w3 = w3_connect(RPC_URL)
-        if RPC_URL == DEFAULT_RPC:
+    if RPC_URL == DEFAULT_RPC:
         print("⚠️  Using default RPC_URL placeholder; set RPC_URL env var for real usage.")
-    primary = fetch_receipt_bundle(w3, tx_hash)
+    w3b = None
+    if RPC_URL_2:
+        print(f"Connecting to secondary RPC: {RPC_URL_2}")
+        w3b = w3_connect(RPC_URL_2)
+
+    # One worker per provider so the secondary lookup overlaps the primary one.
+    # Both Web3 instances are fully set up before any worker starts.
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        fut_primary = ex.submit(fetch_receipt_bundle, w3, tx_hash)
+        fut_secondary = ex.submit(fetch_receipt_bundle, w3b, tx_hash) if w3b is not None else None
+        primary = fut_primary.result()
+        secondary = fut_secondary.result() if fut_secondary is not None else None
+
     print_bundle("PRIMARY", primary)
-        if not RPC_URL_2:
+    if not RPC_URL_2:
         print("ℹ️  Set RPC_URL_2 to enable cross-provider soundness checks.")
 
 
-       if RPC_URL_2:
-        print(f"Connecting to secondary RPC: {RPC_URL_2}")
-        w3b = w3_connect(RPC_URL_2)
-        secondary = fetch_receipt_bundle(w3b, tx_hash)
+    if secondary is not None:
         print_bundle("SECONDARY", secondary)
         print("— Cross-check —")
         same_chain = primary["chain_id"] == secondary["chain_id"]
@@ -148,7 +162,7 @@ def main():
         else:
             print("⚠️  Inconsistency detected — check providers, tags, or re-run.")
 
-      elapsed = time.time() - start
+    elapsed = time.time() - start
     if elapsed < 1:
         print(f"⏱️  Elapsed: {elapsed * 1000:.0f}ms")
     else:
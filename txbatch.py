@@ -5,13 +5,30 @@ cross-RPC comparison of commitments.
 """
 
 import argparse
+import asyncio
 import os
 import sys
 import time
-from typing import Dict, List, Optional, Any
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
 
 from web3 import Web3
-from web3.exceptions import TransactionNotFound
+
+from txrpc import (
+    HTTP2_AVAILABLE,
+    HTTP2Provider,
+    RetryPolicy,
+    RpcResult,
+    close_provider,
+    hex_int,
+    make_session,
+    non_negative_float,
+    positive_int,
+    run_all,
+    safe_rpc_call,
+    split_block_hint,
+)
+from txcommit import commitment_preimage, hex_commitments
 
 Bundle = Dict[str, Any]
 
@@ -20,6 +37,8 @@ DEFAULT_RPC = "https://mainnet.infura.io/v3/your_api_key"
 RPC_URL = os.getenv("RPC_URL", DEFAULT_RPC)
 RPC_URL_2 = os.getenv("RPC_URL_2")  # optional secondary provider
 
+OUTPUT_FLUSH_ROWS = 64
+
 NETWORKS: Dict[int, str] = {
     1: "Ethereum Mainnet",
     11155111: "Sepolia Testnet",
@@ -33,145 +52,158 @@ def network_name(chain_id: int) -> str:
     return NETWORKS.get(chain_id, f"Unknown (chain ID {chain_id})")
 
 
-def safe_rpc_call(func, *args, retries: int = 3, delay: float = 1.0):
-    """Retry wrapper for transient RPC errors."""
-    for attempt in range(1, retries + 1):
-        try:
-            return func(*args)
-        except KeyboardInterrupt:
-            raise
-        except Exception as e:
-            if attempt == retries:
-                print(f"❌ RPC call failed after {retries} attempts: {e}", file=sys.stderr)
-                raise
-            print(f"⚠️  RPC call failed (attempt {attempt}/{retries}): {e}", file=sys.stderr)
-            time.sleep(delay)
-        except Exception as e:
-            # Only sleep if we will retry again
-            if attempt == retries:
-                print(f"❌ RPC call failed after {retries} attempts: {e}", file=sys.stderr)
-                raise
-
-
-
-def w3_connect(url: str) -> Web3:
+def w3_connect(url: str, pool_size: int = 64, http2: bool = False) -> Web3:
     """Create a Web3 HTTP provider and exit if the connection fails."""
-    w3 = Web3(Web3.HTTPProvider(url, request_kwargs={"timeout": 30}))
+    if http2:
+        provider = HTTP2Provider(url, pool_size)
+    else:
+        provider = Web3.HTTPProvider(
+            url, request_kwargs={"timeout": 30}, session=make_session(pool_size)
+        )
+    w3 = Web3(provider)
     if not w3.is_connected():
         print(f"❌ RPC connection failed: {url}", file=sys.stderr)
         sys.exit(1)
     return w3
 
 
-def parse_tx_hash(h: str) -> Optional[str]:
-    """Normalize and validate a tx hash string."""
+def parse_tx_hash(h: str) -> Optional[Tuple[str, bytes]]:
+    """Normalize and validate a tx hash string; return it with its 32 raw bytes."""
     h = h.strip()
     if not h:
         return None
     if not h.startswith("0x"):
         h = "0x" + h
-       if len(h) != 66:
+    if len(h) != 66:
         return None
-    if not Web3.is_hex(h):
+    # bytes.fromhex validates in C, no big-int parse; the length check also
+    # rejects the embedded whitespace it would otherwise tolerate
+    try:
+        raw = bytes.fromhex(h[2:])
+    except ValueError:
+        return None
+    if len(raw) != 32:
         return None
-    return h
+    return h, raw
+
 
+def missing_gas_price(rcpt: Dict[str, Any]) -> bool:
+    """Receipts without effectiveGasPrice need the tx's gasPrice (legacy fallback)."""
+    return rcpt.get("effectiveGasPrice") is None
 
-def build_commitment(
+
+def make_bundle(
     chain_id: int,
-    tx_hash_hex: str,
-    block_number: int,
-    status: int,
-    gas_used: int,
-) -> str:
-    """
-    keccak(chainId[8] || txHash[32] || blockNumber[8] || status[1] || gasUsed[8])
+    chain_bytes: bytes,
+    net_str: str,
+    txh: str,
+    tx_bytes: bytes,
+    rcpt: Dict[str, Any],
+    tx: Optional[Dict[str, Any]],
+) -> Bundle:
     """
-    payload = (
-        chain_id.to_bytes(8, "big")
-        + bytes.fromhex(tx_hash_hex[2:])
-        + block_number.to_bytes(8, "big")
-        + status.to_bytes(1, "big")
-        + gas_used.to_bytes(8, "big")
-    )
-    return "0x" + Web3.keccak(payload).hex()
-
+    Build a bundle from raw JSON-RPC receipt + tx objects.
 
-def fetch_bundle(w3: Web3, txh: str) -> Bundle:
-    """Fetch tx + receipt and compute the commitment."""
-    try:
-        rcpt = safe_rpc_call(w3.eth.get_transaction_receipt, txh)
-        tx = safe_rpc_call(w3.eth.get_transaction, txh)
-    except TransactionNotFound:
-        raise
-    except Exception as e:
-        print(f"❌ Failed to fetch transaction or receipt: {e}", file=sys.stderr)
-        raise
-
-    if rcpt is None:
-        raise RuntimeError("receipt is None (tx pending or unknown)")
-
-    chain_id = safe_rpc_call(lambda: w3.eth.chain_id)
-    status = int(rcpt.status)
-    gas_used = int(rcpt.gasUsed)
-    block_number = int(rcpt.blockNumber)
-    commitment = build_commitment(chain_id, txh, block_number, status, gas_used)
+    The commitment is left as None with its preimage under "preimage";
+    fill_commitments() hashes all preimages in one batch. `chain_bytes` and
+    `net_str` are the provider's encoded chain ID and network name.
+    """
+    status = hex_int(rcpt["status"])
+    gas_used = hex_int(rcpt["gasUsed"])
+    block_number = hex_int(rcpt["blockNumber"])
+    preimage = commitment_preimage(chain_bytes, tx_bytes, block_number, status, gas_used)
 
     # Compute total fee in ETH if possible (nice for batch overview)
-    effective_gas_price = getattr(rcpt, "effectiveGasPrice", None)
-    if effective_gas_price is None:
+    effective_gas_price = rcpt.get("effectiveGasPrice")
+    if effective_gas_price is None and tx is not None:
         effective_gas_price = tx.get("gasPrice")
     if effective_gas_price is not None:
-        total_fee_wei = gas_used * int(effective_gas_price)
+        total_fee_wei = gas_used * hex_int(effective_gas_price)
         total_fee_eth = float(Web3.from_wei(total_fee_wei, "ether"))
     else:
         total_fee_eth = None
 
     return {
         "chain_id": chain_id,
-        "network": network_name(chain_id),
+        "network": net_str,
         "tx_hash": txh,
-        "from": tx["from"],
-        "to": tx["to"],
+        "from": tx["from"] if tx is not None else None,
+        "to": tx["to"] if tx is not None else None,
         "block_number": block_number,
         "status": status,
         "gas_used": gas_used,
         "total_fee_eth": total_fee_eth,
-        "commitment": commitment,
+        "preimage": preimage,
+        "commitment": None,
     }
 
 
+def build_bundles(
+    chain_id: int,
+    chain_bytes: bytes,
+    net_str: str,
+    results: Dict[str, RpcResult],
+    tx_bytes: Dict[str, bytes],
+) -> Tuple[Dict[str, Bundle], Dict[str, str]]:
+    """
+    make_bundle() for every fetched receipt; commitments are filled in later
+    by fill_commitments().
+
+    Returns ({txh: bundle}, {txh: error}) for receipts that were present;
+    fetch errors and missing receipts are left to the caller.
+    """
+    bundles: Dict[str, Bundle] = {}
+    errors: Dict[str, str] = {}
+    for txh, res in results.items():
+        if res["error"] is not None or res["receipt"] is None:
+            continue
+        try:
+            bundles[txh] = make_bundle(
+                chain_id, chain_bytes, net_str, txh, tx_bytes[txh], res["receipt"], res["tx"]
+            )
+        except Exception as e:
+            errors[txh] = str(e) or type(e).__name__
+    return bundles, errors
+
+
+def fill_commitments(*bundle_sets: Dict[str, Bundle]) -> None:
+    """Replace the pending preimages of all bundle sets by their commitments."""
+    commitments = hex_commitments(
+        b["preimage"] for bundles in bundle_sets for b in bundles.values()
+    )
+    for bundles in bundle_sets:
+        for b in bundles.values():
+            b["commitment"] = commitments[b.pop("preimage")]
+
+
 def load_hashes(args: argparse.Namespace) -> List[str]:
-    """Collect tx hashes from --tx and/or --file, de-duped."""
+    """
+    Collect raw "<hash>" or "<hash>,<block>" entries from --tx and/or --file
+    (de-duped by main).
+    """
     hashes: List[str] = []
 
     for h in args.tx:
         hashes.append(h)
 
-    if args.file:
-        if args.file == "-":
-            fh = sys.stdin
-        else:
-            try:
-                fh = open(args.file, "r", encoding="utf-8")
-            except OSError as exc:
-                print(f"❌ Failed to open file {args.file}: {exc}", file=sys.stderr)
-                sys.exit(1)
-        with fh:
-            for line in fh:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                hashes.append(line)
-
-    # Deduplicate while preserving order
-    seen = set()
-    unique: List[str] = []
-    for h in hashes:
-        if h not in seen:
-            seen.add(h)
-            unique.append(h)
-    return unique
+    if args.file == "-":
+        # Keep streaming for stdin so piped producers are consumed incrementally
+        for line in sys.stdin:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            hashes.append(line)
+    elif args.file:
+        # Regular files: one buffered read and a C-level split
+        try:
+            data = Path(args.file).read_text(encoding="utf-8")
+        except OSError as exc:
+            print(f"❌ Failed to open file {args.file}: {exc}", file=sys.stderr)
+            sys.exit(1)
+        hashes.extend(
+            s for s in map(str.strip, data.splitlines()) if s and not s.startswith("#")
+        )
+    return hashes
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -179,7 +211,7 @@ def build_parser() -> argparse.ArgumentParser:
         description="Batch-check tx commitment soundness for multiple transactions.",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
-        p.add_argument(
+    p.add_argument(
         "--short-hash",
         action="store_true",
         help="Print shortened tx hashes (0x + first 10 chars) in main output.",
@@ -189,9 +221,10 @@ def build_parser() -> argparse.ArgumentParser:
         "--tx",
         action="append",
         default=[],
-        help="Transaction hash (0x...). Can be specified multiple times.",
+        help="Transaction hash (0x...), optionally with its block as "
+        "<hash>,<block>. Can be specified multiple times.",
     )
-        p.add_argument(
+    p.add_argument(
         "--no-header",
         action="store_true",
         help="Do not print the table header line.",
@@ -211,20 +244,86 @@ def build_parser() -> argparse.ArgumentParser:
     )
     p.add_argument(
         "--file",
-        help="Path to file with one tx hash per line (use '-' for stdin).",
+        help="Path to file with one tx hash per line, optionally followed by "
+        "its block number (use '-' for stdin).",
     )
     p.add_argument(
         "--no-emoji",
         action="store_true",
         help="Disable emoji in output (useful for CI logs).",
     )
+    p.add_argument(
+        "--batch-size",
+        type=positive_int,
+        default=100,
+        help="Max tx hashes per JSON-RPC batch request (providers cap batch size).",
+    )
+    p.add_argument(
+        "--concurrency",
+        type=positive_int,
+        default=8,
+        help="Max JSON-RPC batch requests in flight at once across providers.",
+    )
+    p.add_argument(
+        "--pool-size",
+        type=positive_int,
+        default=64,
+        help="Max keep-alive HTTP connections per provider.",
+    )
+    p.add_argument(
+        "--skip-tx-fields",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Only fetch the tx itself when the receipt lacks effectiveGasPrice "
+        "(from/to are then omitted). Use --no-skip-tx-fields to always fetch it.",
+    )
+    p.add_argument(
+        "--block-receipts",
+        action="store_true",
+        help="For hashes given with their block (\"<hash>,<block>\" lines), fetch "
+        "receipts with one eth_getBlockReceipts per distinct block; the rest use "
+        "eth_getTransactionReceipt. Cuts calls when many hashes share blocks; "
+        "not all providers support it.",
+    )
+    p.add_argument(
+        "--verbose-mismatch",
+        action="store_true",
+        help="On a cross-provider mismatch, show which fields differ.",
+    )
+    p.add_argument(
+        "--http2",
+        action="store_true",
+        help="Send RPC traffic over HTTP/2 via httpx, multiplexing concurrent "
+        "requests on one connection (needs: pip install 'httpx[http2]')",
+    )
+    p.add_argument(
+        "--retry-base",
+        type=non_negative_float,
+        default=RetryPolicy().base,
+        help="First retry delay in seconds; doubles on each further attempt.",
+    )
+    p.add_argument(
+        "--retry-max",
+        type=non_negative_float,
+        default=RetryPolicy().max_delay,
+        help="Cap on the exponential retry delay in seconds.",
+    )
+    p.add_argument(
+        "--retry-jitter",
+        type=non_negative_float,
+        default=RetryPolicy().jitter,
+        help="Max random seconds added to each retry delay.",
+    )
     return p
 
 
 def main() -> int:
     parser = build_parser()
     args = parser.parse_args()
-no_header = args.no_header
+    retry = RetryPolicy(
+        base=args.retry_base, max_delay=args.retry_max, jitter=args.retry_jitter
+    )
+    no_header = args.no_header
     use_emoji = not args.no_emoji
     short_hashes = args.short_hash
     ok_icon = "✅" if use_emoji else "OK"
@@ -249,32 +348,65 @@ no_header = args.no_header
         parser.print_help()
         return 1
 
-    # Normalize and filter hashes
+    # Normalize, dedup and validate in one pass
     tx_hashes: List[str] = []
+    tx_bytes: Dict[str, bytes] = {}  # decoded once here, reused for the preimages
+    block_hints: Dict[str, str] = {}  # from "<hash>,<block>" lines
+    seen = set()
     invalid_count = 0
     for raw in hashes_raw:
-        h = parse_tx_hash(raw)
-        if h is None:
+        if raw in seen:
+            continue
+        seen.add(raw)
+        split = split_block_hint(raw)
+        parsed = parse_tx_hash(split[0]) if split is not None else None
+        if parsed is None:
             print(f"{err_icon} invalid tx hash: {raw}", file=sys.stderr)
             invalid_count += 1
             continue
+        h, b = parsed
+        if h in tx_bytes:  # same hash given with and without 0x
+            continue
+        tx_bytes[h] = b
         tx_hashes.append(h)
+        if split[1] is not None:
+            block_hints[h] = split[1]
 
     if not tx_hashes:
         print(f"{err_icon} No valid transaction hashes to process.", file=sys.stderr)
         return 1
 
+    if args.http2 and not HTTP2_AVAILABLE:
+        print(
+            f"{err_icon} --http2 needs httpx with HTTP/2 support: "
+            "pip install 'httpx[http2]'",
+            file=sys.stderr,
+        )
+        return 1
+
+    if args.block_receipts and not block_hints:
+        print(
+            f"{warn_icon}--block-receipts needs block numbers in the input "
+            "(<hash>,<block>); fetching every receipt per tx.",
+            file=sys.stderr,
+        )
+
     start = time.time()
 
     # Connect primary
     print(f"Connecting to primary RPC: {RPC_URL}")
-        if not RPC_URL:
+    if not RPC_URL:
         print(f"{err_icon} RPC_URL is not set.", file=sys.stderr)
         return 1
-    w3 = w3_connect(RPC_URL)
-    primary_chain_id = safe_rpc_call(lambda: w3.eth.chain_id)
+    w3 = w3_connect(RPC_URL, args.pool_size, args.http2)
+    primary_chain_id = safe_rpc_call(lambda: w3.eth.chain_id, policy=retry)
+    # Invariant per provider: encode the chain ID and look up its name once
+    primary_chain_bytes = primary_chain_id.to_bytes(8, "big")
+    primary_net_str = network_name(primary_chain_id)
+    # The Web3 provider is only needed for chainId; receipts go through run_all
+    close_provider(w3)
     print(
-        f"{ok_icon} Primary: {network_name(primary_chain_id)} "
+        f"{ok_icon} Primary: {primary_net_str} "
         f"(chainId {primary_chain_id})"
     )
     if not RPC_URL_2:
@@ -282,42 +414,95 @@ no_header = args.no_header
 
     # Optional secondary
     w3b: Optional[Web3] = None
+    secondary_chain_id: Optional[int] = None
+    secondary_chain_bytes = b""
+    secondary_net_str = ""
     if RPC_URL_2:
         print(f"Connecting to secondary RPC: {RPC_URL_2}")
-        w3b = w3_connect(RPC_URL_2)
-        secondary_chain_id = safe_rpc_call(lambda: w3b.eth.chain_id)
+        w3b = w3_connect(RPC_URL_2, args.pool_size, args.http2)
+        secondary_chain_id = safe_rpc_call(lambda: w3b.eth.chain_id, policy=retry)
+        secondary_chain_bytes = secondary_chain_id.to_bytes(8, "big")
+        secondary_net_str = network_name(secondary_chain_id)
         print(
-            f"{ok_icon} Secondary: {network_name(secondary_chain_id)} "
+            f"{ok_icon} Secondary: {secondary_net_str} "
             f"(chainId {secondary_chain_id})"
         )
+        close_provider(w3b)
 
-        if not no_header:
+    if not no_header:
         print("\n# tx | status | chain | block | fee(ETH) | commitment | cross-check")
 
-
     success_count = 0
     fail_count = 0
     pending_count = 0
     not_found_count = 0
     mismatch_count = 0
 
+    # One batched round-trip per chunk instead of 2 RPCs per tx per provider,
+    # with both providers (and all chunks) in flight concurrently
+    results_primary, results_secondary = asyncio.run(
+        run_all(
+            tx_hashes,
+            RPC_URL,
+            RPC_URL_2 if w3b is not None else None,
+            args.batch_size,
+            args.concurrency,
+            args.pool_size,
+            need_tx=missing_gas_price if args.skip_tx_fields else (lambda rcpt: True),
+            block_hints=block_hints if args.block_receipts else None,
+            http2=args.http2,
+            retry=retry,
+        )
+    )
+
+    # Assemble every preimage from both providers first, then hash each
+    # distinct preimage once in a single batch
+    bundles_primary, errors_primary = build_bundles(
+        primary_chain_id, primary_chain_bytes, primary_net_str, results_primary, tx_bytes
+    )
+    bundles_secondary: Dict[str, Bundle] = {}
+    errors_secondary: Dict[str, str] = {}
+    if results_secondary is not None:
+        bundles_secondary, errors_secondary = build_bundles(
+            secondary_chain_id,
+            secondary_chain_bytes,
+            secondary_net_str,
+            results_secondary,
+            tx_bytes,
+        )
+    fill_commitments(bundles_primary, bundles_secondary)
+
+    # Rows are buffered and written in blocks of OUTPUT_FLUSH_ROWS instead of
+    # one print() (lock + write syscall) per row
+    out: List[str] = []
+
+    def emit(line: str) -> None:
+        out.append(line)
+        if len(out) >= OUTPUT_FLUSH_ROWS:
+            sys.stdout.write("\n".join(out) + "\n")
+            out.clear()
+
     for txh in tx_hashes:
-        try:
-            bundle_primary = fetch_bundle(w3, txh)
-                    bn = bundle_primary["block_number"]
-        if args.min_block is not None and bn < args.min_block:
-            continue
-        if args.max_block is not None and bn > args.max_block:
+        res = results_primary[txh]
+        if res["error"] is not None:
+            print(f"{err_icon} {txh} | error on primary RPC: {res['error']}", file=sys.stderr)
+            fail_count += 1
             continue
-
-        except TransactionNotFound:
-            print(f"{err_icon} {txh} | not-found on primary RPC")
+        if res["receipt"] is None:
+            emit(f"{err_icon} {txh} | not-found on primary RPC")
             not_found_count += 1
             continue
-        except Exception as e:
-            print(f"{err_icon} {txh} | error on primary RPC: {e}", file=sys.stderr)
+        if txh in errors_primary:
+            print(f"{err_icon} {txh} | error on primary RPC: {errors_primary[txh]}", file=sys.stderr)
             fail_count += 1
             continue
+        bundle_primary = bundles_primary[txh]
+
+        bn = bundle_primary["block_number"]
+        if args.min_block is not None and bn < args.min_block:
+            continue
+        if args.max_block is not None and bn > args.max_block:
+            continue
 
         status_str = "success" if bundle_primary["status"] == 1 else "failed"
         fee_str = (
@@ -329,32 +514,33 @@ no_header = args.no_header
         cross_note = "-"
         match = True
 
-        if w3b is not None:
+        if results_secondary is not None:
+            res_b = results_secondary[txh]
             try:
-                bundle_secondary = fetch_bundle(w3b, txh)
-                same_chain = bundle_primary["chain_id"] == bundle_secondary["chain_id"]
-                same_block = (
-                    bundle_primary["block_number"] == bundle_secondary["block_number"]
-                )
-                same_status = (
-                    bundle_primary["status"] == bundle_secondary["status"]
-                )
-                same_gas = (
-                    bundle_primary["gas_used"] == bundle_secondary["gas_used"]
-                )
-                same_commit = (
-                    bundle_primary["commitment"]
-                    == bundle_secondary["commitment"]
-                )
-
-                if all([same_chain, same_block, same_status, same_gas, same_commit]):
-                    cross_note = f"{match_icon} ok"
-                else:
-                    cross_note = f"{mismatch_icon} mismatch"
+                if res_b["error"] is not None:
+                    raise RuntimeError(res_b["error"])
+                if txh in errors_secondary:
+                    raise RuntimeError(errors_secondary[txh])
+                if res_b["receipt"] is None:
+                    cross_note = f"{warn_icon}not-found on secondary"
                     match = False
-            except TransactionNotFound:
-                cross_note = f"{warn_icon}not-found on secondary"
-                match = False
+                else:
+                    bundle_secondary = bundles_secondary[txh]
+                    # The commitment hashes chain, block, status and gas, so one
+                    # compare covers them all; the fields are only compared one
+                    # by one to explain a mismatch
+                    if bundle_primary["commitment"] == bundle_secondary["commitment"]:
+                        cross_note = f"{match_icon} ok"
+                    else:
+                        cross_note = f"{mismatch_icon} mismatch"
+                        match = False
+                        if args.verbose_mismatch:
+                            diffs = [
+                                f"{field} {bundle_primary[field]} != {bundle_secondary[field]}"
+                                for field in ("chain_id", "block_number", "status", "gas_used")
+                                if bundle_primary[field] != bundle_secondary[field]
+                            ]
+                            cross_note += f" ({'; '.join(diffs)})"
             except Exception as e:
                 cross_note = f"{warn_icon}error on secondary: {e}"
                 match = False
@@ -363,10 +549,8 @@ no_header = args.no_header
             display_hash = txh[:12] + "…"
 
         icon = ok_icon if bundle_primary["status"] == 1 else err_icon
-        print(
-             f"{icon} {display_hash} | {status_str} | "
-            f"{bundle_primary['chain_id']} | "
-            f"{icon} {txh} | {status_str} | "
+        emit(
+            f"{icon} {display_hash} | {status_str} | "
             f"{bundle_primary['chain_id']} | "
             f"{bundle_primary['block_number']} | "
             f"{fee_str} | "
@@ -380,6 +564,8 @@ no_header = args.no_header
             fail_count += 1
         if not match and w3b is not None:
             mismatch_count += 1
+    if out:
+        sys.stdout.write("\n".join(out) + "\n")
 
     elapsed = time.time() - start
     elapsed_str = f"{elapsed * 1000:.0f}ms" if elapsed < 1 else f"{elapsed:.2f}s"
@@ -400,7 +586,7 @@ no_header = args.no_header
             file=sys.stderr,
         )
         return 2 if w3b is not None else 0
- if invalid_count > 0:
+    if invalid_count > 0:
         print(
             f"{warn_icon}{invalid_count} invalid tx hash(es) were skipped.",
             file=sys.stderr,
@@ -0,0 +1,51 @@
+"""
+Soundness commitment shared by txapp.py, txbatch.py and tx_batch_auditor.py:
+
+  keccak(chainId[8] || txHash[32] || blockNumber[8] || status[1] || gasUsed[8])
+"""
+
+import struct
+from typing import Dict, Iterable, List
+
+from Crypto.Hash import keccak
+
+# chainId[8] || txHash[32] || blockNumber[8] || status[1] || gasUsed[8]
+_PACK = struct.Struct(">8s32sQBQ").pack
+
+
+def commitment_preimage(
+    chain_bytes: bytes,
+    tx_bytes: bytes,
+    block_number: int,
+    status: int,
+    gas_used: int,
+) -> bytes:
+    """
+    chainId[8] || txHash[32] || blockNumber[8] || status[1] || gasUsed[8]
+
+    `chain_bytes` is the chain ID already encoded as 8 big-endian bytes; it is
+    invariant per provider, so callers encode it once.
+    """
+    return _PACK(chain_bytes, tx_bytes, block_number, status, gas_used)
+
+
+def keccak256_many(preimages: List[bytes]) -> List[bytes]:
+    """
+    Keccak-256 of each preimage, in order.
+
+    All commitment preimages are independent, so the whole batch is hashed in
+    one call; this is the single place to plug in a multi-lane (SIMD) Keccak
+    backend. Currently pycryptodome's single-lane C implementation.
+    """
+    new = keccak.new
+    return [new(digest_bits=256, data=p).digest() for p in preimages]
+
+
+def hex_commitments(preimages: Iterable[bytes]) -> Dict[bytes, str]:
+    """
+    Map each distinct preimage to its "0x..." commitment with one
+    keccak256_many() call. Preimages are interned first, so when providers
+    agree on (chainId, tx, block, status, gasUsed) the Keccak work is done once.
+    """
+    unique = list(dict.fromkeys(preimages))
+    return {p: "0x" + d.hex() for p, d in zip(unique, keccak256_many(unique))}
@@ -0,0 +1,405 @@
+"""
+JSON-RPC transport shared by txapp.py, txbatch.py and tx_batch_auditor.py:
+the keep-alive session behind the Web3 providers, retry/backoff, the async
+client used for batch POSTs, the batched receipt fetch built on it and the
+optional HTTP/2 (httpx) transport.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+
+try:  # optional: HTTP/2 transport for --http2 (pip install 'httpx[http2]')
+    import h2  # noqa: F401  httpx's HTTP/2 backend
+    import httpx
+except ImportError:
+    httpx = None
+
+HTTP2_AVAILABLE = httpx is not None
+
+HttpSession = Any  # aiohttp.ClientSession, or httpx.AsyncClient with --http2
+
+
+def hex_int(value: Any) -> int:
+    """Decode a JSON-RPC quantity ("0x..." string or plain int)."""
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {n}")
+    return n
+
+
+def split_block_hint(line: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Split an input line "<txhash>" or "<txhash>,<block>" (a space works too)
+    into the hash and the block as a JSON-RPC quantity ("0x..."), or None if
+    no block is given. The block may be decimal or 0x-hex. Returns None for a
+    malformed line.
+    """
+    parts = line.replace(",", " ").split()
+    if len(parts) < 2:
+        return line.strip(), None
+    if len(parts) > 2:
+        return None
+    h, block = parts
+    try:
+        n = int(block, 16) if block[:2].lower() == "0x" else int(block, 10)
+    except ValueError:
+        return None
+    return (h, hex(n)) if n >= 0 else None
+
+
+def non_negative_float(value: str) -> float:
+    """argparse type for delays in seconds."""
+    try:
+        x = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid float value: {value!r}")
+    if not x >= 0:  # also rejects nan
+        raise argparse.ArgumentTypeError(f"must be >= 0, got {value}")
+    return x
+
+
+class RetryPolicy(NamedTuple):
+    """Attempts and capped exponential backoff (seconds) for transient RPC errors."""
+
+    retries: int = 5
+    base: float = 0.1
+    max_delay: float = 10.0
+    jitter: float = 0.1
+
+
+class BatchRejectedError(RuntimeError):
+    """The provider answered a batch with one error object; retrying won't help."""
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Seconds from a Retry-After header if `exc` is an HTTP 429, else None."""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        status, headers = exc.status, exc.headers
+    else:
+        # requests.HTTPError from web3's HTTPProvider, HTTP2TransportError or
+        # httpx.HTTPStatusError with --http2: all carry the response
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+        headers = getattr(response, "headers", None)
+    if status != 429:
+        return None
+    try:
+        return float(headers["Retry-After"]) if headers else None
+    except (KeyError, TypeError, ValueError):
+        return None  # absent, or an HTTP-date: fall back to backoff
+
+
+def backoff_delay(attempt: int, exc: Exception, policy: RetryPolicy = RetryPolicy()) -> float:
+    """Capped exponential backoff with jitter, honoring Retry-After on 429s."""
+    retry_after = _retry_after(exc)
+    if retry_after is not None:
+        # A provider asking for an hour must not stall every attempt that long
+        return min(policy.max_delay, max(0.0, retry_after))
+    delay = min(policy.max_delay, policy.base * (2 ** (attempt - 1)))
+    return delay + random.random() * policy.jitter
+
+
+def safe_rpc_call(func, *args, policy: RetryPolicy = RetryPolicy()):
+    """Retry wrapper for transient RPC errors."""
+    for attempt in range(1, policy.retries + 1):
+        try:
+            return func(*args)
+        except Exception as e:
+            if attempt == policy.retries:
+                print(f"❌ RPC call failed after {policy.retries} attempts: {e}", file=sys.stderr)
+                raise
+            print(f"⚠️  RPC call failed (attempt {attempt}/{policy.retries}): {e}", file=sys.stderr)
+            time.sleep(backoff_delay(attempt, e, policy))
+
+
+async def async_safe_rpc_call(func, *args, policy: RetryPolicy = RetryPolicy()):
+    """
+    Retry wrapper for transient RPC errors (coroutine flavour). A rejected
+    batch is raised at once. Callers bounding concurrency should take their
+    semaphore inside `func`, so it is not held across the backoff sleeps.
+    """
+    for attempt in range(1, policy.retries + 1):
+        try:
+            return await func(*args)
+        except BatchRejectedError:
+            raise
+        except Exception as e:
+            if attempt == policy.retries:
+                print(f"❌ RPC call failed after {policy.retries} attempts: {e}", file=sys.stderr)
+                raise
+            print(f"⚠️  RPC call failed (attempt {attempt}/{policy.retries}): {e}", file=sys.stderr)
+            await asyncio.sleep(backoff_delay(attempt, e, policy))
+
+
+def make_session(pool_size: int = 64) -> requests.Session:
+    """Keep-alive HTTP session so TCP/TLS setup is paid once, not per RPC call."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+class HTTP2TransportError(OSError):
+    """
+    An httpx failure re-raised as OSError: web3's is_connected() only catches
+    OSError (which requests' errors already are). Keeps the HTTP response, if
+    any, so a 429's Retry-After is still honored.
+    """
+
+    def __init__(self, exc: Exception) -> None:
+        super().__init__(str(exc) or type(exc).__name__)
+        self.response = getattr(exc, "response", None)
+
+
+class HTTP2Provider(Web3.HTTPProvider):
+    """
+    HTTPProvider that POSTs through an httpx HTTP/2 client, so concurrent
+    calls multiplex over one connection instead of queueing per connection.
+    Call close() when done with it.
+    """
+
+    def __init__(self, url: str, pool_size: int = 64, timeout: float = 30) -> None:
+        super().__init__(url)
+        self._client = httpx.Client(
+            http2=True,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+        )
+
+    def make_request(self, method: Any, params: Any) -> Any:
+        try:
+            r = self._client.post(
+                self.endpoint_uri,
+                content=self.encode_rpc_request(method, params),
+                headers=self.get_request_headers(),
+            )
+            r.raise_for_status()
+        except httpx.HTTPError as e:
+            raise HTTP2TransportError(e) from e
+        return self.decode_rpc_response(r.content)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def close_provider(w3: Web3) -> None:
+    """Release the connections of a Web3 instance built on HTTP2Provider."""
+    if isinstance(w3.provider, HTTP2Provider):
+        w3.provider.close()
+
+
+def make_async_session(
+    pool_size: int = 64, http2: bool = False, timeout: float = 30
+) -> HttpSession:
+    """Async client for the batch POSTs: aiohttp, or httpx over HTTP/2."""
+    if http2:
+        return httpx.AsyncClient(
+            http2=True,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+        )
+    connector = aiohttp.TCPConnector(limit=pool_size, keepalive_timeout=60)
+    return aiohttp.ClientSession(
+        connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)
+    )
+
+
+async def async_make_request(
+    session: HttpSession, url: str, payload: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """POST one JSON-RPC batch and return the decoded response array."""
+    if httpx is not None and isinstance(session, httpx.AsyncClient):
+        r = await session.post(url, json=payload)
+        r.raise_for_status()
+        responses = r.json()
+    else:
+        async with session.post(url, json=payload) as r:
+            r.raise_for_status()
+            responses = await r.json(content_type=None)
+    if not isinstance(responses, list):
+        # Providers without batch support answer with a single error object
+        raise BatchRejectedError(f"batch request rejected: {responses.get('error', responses)}")
+    return responses
+
+
+RpcResult = Dict[str, Any]  # {"receipt", "tx", "error"} per tx hash
+
+
+async def batch_fetch(
+    session: HttpSession,
+    url: str,
+    hashes: List[str],
+    batch_size: int,
+    sem: asyncio.Semaphore,
+    need_tx: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    block_hints: Optional[Dict[str, str]] = None,
+    retry: RetryPolicy = RetryPolicy(),
+) -> Dict[str, RpcResult]:
+    """
+    Fetch receipts (+ txs where needed) for many hashes using JSON-RPC batches.
+
+    Each chunk of `batch_size` hashes is sent as one HTTP POST, retried per
+    `retry`; chunks are in flight concurrently, bounded by `sem`, and
+    responses are matched back by id. Receipts come first; then
+    eth_getTransactionByHash is batched for the receipts `need_tx` accepts
+    (none when it is None).
+
+    `block_hints` maps hashes to the block ("0x..." quantity) they were
+    listed with: those are fetched with one eth_getBlockReceipts per distinct
+    block and picked out by transactionHash. Hashes without a hint, or not
+    found in their hinted block, fall back to eth_getTransactionReceipt, so a
+    wrong hint costs a call but never changes a receipt.
+    Returns {txh: {"receipt", "tx", "error"}}.
+    """
+    out: Dict[str, RpcResult] = {
+        h: {"receipt": None, "tx": None, "error": None} for h in hashes
+    }
+
+    async def post(calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        async with sem:  # released while async_safe_rpc_call backs off
+            return await async_make_request(session, url, calls)
+
+    async def fetch_chunk(method: str, key: str, chunk: List[str]) -> None:
+        calls = [
+            {"jsonrpc": "2.0", "id": n, "method": method, "params": [h]}
+            for n, h in enumerate(chunk)
+        ]
+        try:
+            responses = await async_safe_rpc_call(post, calls, policy=retry)
+        except Exception as e:
+            for h in chunk:
+                out[h]["error"] = str(e) or type(e).__name__
+            return
+
+        unanswered = set(range(len(chunk)))
+        for resp in responses:
+            n = resp.get("id")
+            if not isinstance(n, int) or not 0 <= n < len(chunk):
+                continue
+            unanswered.discard(n)
+            h = chunk[n]
+            if "error" in resp:
+                out[h]["error"] = resp["error"].get("message", str(resp["error"]))
+            else:
+                out[h][key] = resp.get("result")
+
+        # A truncated batch reply is a provider error, not a missing tx
+        for n in unanswered:
+            out[chunk[n]]["error"] = "no response to this call in the batch reply"
+
+    async def fetch_all(method: str, key: str, hs: List[str]) -> None:
+        await asyncio.gather(
+            *(fetch_chunk(method, key, hs[i : i + batch_size]) for i in range(0, len(hs), batch_size))
+        )
+
+    async def fetch_block_chunk(blocks: List[str], by_block: Dict[str, List[str]]) -> None:
+        calls = [
+            {"jsonrpc": "2.0", "id": n, "method": "eth_getBlockReceipts", "params": [b]}
+            for n, b in enumerate(blocks)
+        ]
+        try:
+            responses = await async_safe_rpc_call(post, calls, policy=retry)
+        except Exception as e:
+            for b in blocks:
+                for h in by_block[b]:
+                    out[h]["error"] = str(e) or type(e).__name__
+            return
+
+        unanswered = set(range(len(blocks)))
+        for resp in responses:
+            n = resp.get("id")
+            if not isinstance(n, int) or not 0 <= n < len(blocks):
+                continue
+            unanswered.discard(n)
+            wanted = {h.lower(): h for h in by_block[blocks[n]]}
+            if "error" in resp:
+                for h in wanted.values():
+                    out[h]["error"] = resp["error"].get("message", str(resp["error"]))
+                continue
+            for rcpt in resp.get("result") or []:
+                h = wanted.get(str(rcpt.get("transactionHash", "")).lower())
+                if h is not None:
+                    out[h]["receipt"] = rcpt
+
+        for n in unanswered:
+            for h in by_block[blocks[n]]:
+                out[h]["error"] = "no response to this call in the batch reply"
+
+    per_tx = hashes
+    if block_hints:
+        by_block: Dict[str, List[str]] = {}
+        for h in hashes:
+            if h in block_hints:
+                by_block.setdefault(block_hints[h], []).append(h)
+        blocks = list(by_block)
+        await asyncio.gather(
+            *(
+                fetch_block_chunk(blocks[i : i + batch_size], by_block)
+                for i in range(0, len(blocks), batch_size)
+            )
+        )
+        per_tx = [h for h in hashes if out[h]["receipt"] is None and out[h]["error"] is None]
+    await fetch_all("eth_getTransactionReceipt", "receipt", per_tx)
+
+    if need_tx is not None:
+        tx_hashes = [
+            h
+            for h in hashes
+            if out[h]["error"] is None
+            and out[h]["receipt"] is not None
+            and need_tx(out[h]["receipt"])
+        ]
+        if tx_hashes:
+            await fetch_all("eth_getTransactionByHash", "tx", tx_hashes)
+    return out
+
+
+async def run_all(
+    hashes: List[str],
+    url: str,
+    url_2: Optional[str],
+    batch_size: int,
+    concurrency: int,
+    pool_size: int = 64,
+    need_tx: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    block_hints: Optional[Dict[str, str]] = None,
+    http2: bool = False,
+    retry: RetryPolicy = RetryPolicy(),
+    timeout: float = 30,
+) -> Tuple[Dict[str, RpcResult], Optional[Dict[str, RpcResult]]]:
+    """Query primary and (optional) secondary providers concurrently."""
+    sem = asyncio.Semaphore(concurrency)
+    async with make_async_session(pool_size, http2, timeout) as session:
+        urls = [url] + ([url_2] if url_2 else [])
+        results = await asyncio.gather(
+            *(
+                batch_fetch(
+                    session, u, hashes, batch_size, sem, need_tx, block_hints, retry
+                )
+                for u in urls
+            )
+        )
+    return results[0], (results[1] if url_2 else None)